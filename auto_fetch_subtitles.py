@@ -1,13 +1,30 @@
 #!/usr/bin/env python3
 import argparse
-import csv
+import asyncio
 import os
 import re
 import shutil
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
+import download_youtube_channel_list
+import srt_to_markdown
+from download_youtube_channel_list import read_urls_from_multi_column_csv, video_id
+
+QUEUE_SIZE = 2
+_HANDLE_RE = re.compile(r"@([^/?#]+)")
+_VID_RE = re.compile(r"\[([a-zA-Z0-9_-]{11})\]")
+
+# 代理环境变量，启动时生成一次供所有 yt-dlp 调用复用
+_PROXY_ENV = {
+    **os.environ,
+    'https_proxy': 'http://127.0.0.1:7897',
+    'http_proxy': 'http://127.0.0.1:7897',
+    'all_proxy': 'socks5://127.0.0.1:7897',
+}
+
 
 def read_channels(channel_file: str) -> list[str]:
     channels = []
@@ -22,7 +39,7 @@ def read_channels(channel_file: str) -> list[str]:
 def extract_handle(channel_url: str) -> str:
     if "search_query=20vc" in channel_url:
         return "20vc"
-    match = re.search(r"@([^/?#]+)", channel_url)
+    match = _HANDLE_RE.search(channel_url)
     if match:
         return match.group(1)
     return "unknown"
@@ -32,15 +49,7 @@ def get_channel_videos(channel_url: str, limit: int, csv_dir: str, incremental:
     handle = extract_handle(channel_url)
     csv_path = os.path.join(csv_dir, f"{handle}.csv")
     
-    # 设置代理环境变量
-    env = os.environ.copy()
-    env['https_proxy'] = 'http://127.0.0.1:7897'
-    env['http_proxy'] = 'http://127.0.0.1:7897'
-    env['all_proxy'] = 'socks5://127.0.0.1:7897'
-    
-    cmd = [
-        sys.executable,
-        "download_youtube_channel_list.py",
+    argv = [
         "--channel-url", channel_url,
         "--limit", str(limit),
         "--output", csv_path,
@@ -48,78 +57,157 @@ def get_channel_videos(channel_url: str, limit: int, csv_dir: str, incremental:
     ]
     
     if incremental:
-        cmd.append("--incremental")
+        argv.append("--incremental")
     
-    subprocess.run(cmd, check=True, env=env)
+    # 直接在当前进程调用，省去每个频道启动一次 Python 解释器
+    returncode = download_youtube_channel_list.main(argv, env=_PROXY_ENV)
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, argv)
     return csv_path
 
 
-def download_srt_files(csv_path: str, srt_base_dir: str) -> None:
+def build_srt_command(srt_dir: str) -> list[str]:
+    # URL 通过 stdin 批量传入，一个 yt-dlp 进程处理多个视频
+    return [
+        "yt-dlp",
+        "--proxy", "http://127.0.0.1:7897",
+        "--write-subs",
+        "--write-auto-subs",
+        "--sub-format", "srt",
+        "--skip-download",
+        "--paths", f"subtitle:{srt_dir}",
+        "--no-abort-on-error",
+        "--batch-file", "-",
+    ]
+
+
+def download_srt_files(csv_path: str, srt_base_dir: str, workers: int = 10) -> None:
     channel_name = Path(csv_path).stem
     srt_dir = os.path.join(srt_base_dir, channel_name, "srt")
+    os.makedirs(srt_dir, exist_ok=True)
     
-    # 设置代理环境变量
-    env = os.environ.copy()
-    env['https_proxy'] = 'http://127.0.0.1:7897'
-    env['http_proxy'] = 'http://127.0.0.1:7897'
-    env['all_proxy'] = 'socks5://127.0.0.1:7897'
+    # 获取已存在的视频ID，例如: "Video Title [videoId].en.srt"
+    with os.scandir(srt_dir) as it:
+        existing_videos = frozenset(
+            m.group(1)
+            for entry in it
+            if entry.name.endswith(".srt") and (m := _VID_RE.search(entry.name))
+        )
     
-    # 创建临时脚本来下载 SRT（只下载新的）
-    import tempfile
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as f:
-        f.write(f'''#!/usr/bin/env python3
-import csv
-import subprocess
-import os
-import glob
-
-csv_path = "{csv_path}"
-srt_dir = "{srt_dir}"
-os.makedirs(srt_dir, exist_ok=True)
-
-# 获取已存在的视频ID
-existing_videos = set()
-for srt_file in glob.glob(os.path.join(srt_dir, "*.srt")):
-    # 从文件名提取视频ID，例如: "Video Title [videoId].en.srt"
-    filename = os.path.basename(srt_file)
-    if "[" in filename and "]" in filename:
-        video_id = filename.split("[")[1].split("]")[0]
-        existing_videos.add(video_id)
-
-urls = []
-with open(csv_path, 'r', encoding='utf-8') as f:
-    reader = csv.DictReader(f)
-    for row in reader:
-        url = row.get("webpage_url", "").strip()
-        if url:
-            # 提取视频ID
-            if "v=" in url:
-                video_id = url.split("v=")[1].split("&")[0]
-                if video_id not in existing_videos:
-                    urls.append(url)
-
-for url in urls:
-    try:
-        cmd = [
-            "yt-dlp",
-            "--proxy", "http://127.0.0.1:7897",
-            "--write-subs", 
-            "--write-auto-subs",
-            "--sub-format", "srt",
-            "--skip-download",
-            "--paths", f"subtitle:{{srt_dir}}",
-            url
-        ]
-        subprocess.run(cmd, check=True, capture_output=True)
-    except subprocess.CalledProcessError:
-        pass
-''')
-        temp_script = f.name
+    # 只下载新的 SRT
+    urls = []
+    for url in read_urls_from_multi_column_csv(csv_path):
+        if "v=" in url and video_id(url) not in existing_videos:
+            urls.append(url)
+    
+    if not urls:
+        return
     
-    try:
-        subprocess.run([sys.executable, temp_script], check=True, env=env)
-    finally:
-        os.unlink(temp_script)
+    # 字幕下载是纯网络 I/O：把 URL 分成 workers 批，每批交给一个 yt-dlp 进程，
+    # 多个批次并发执行，yt-dlp 的启动开销按批而不是按 URL 计算
+    workers = max(1, min(workers, len(urls)))
+    batches = [urls[i::workers] for i in range(workers)]
+    cmd = build_srt_command(srt_dir)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                subprocess.run,
+                cmd,
+                input="".join(f"{url}\n" for url in batch).encode(),
+                check=False,
+                capture_output=True,
+                env=_PROXY_ENV,
+            ): batch
+            for batch in batches
+        }
+        for future in as_completed(futures):
+            batch = futures[future]
+            try:
+                result = future.result()
+            except OSError as exc:
+                print(f"  ✗ {len(batch)} videos ({exc})", file=sys.stderr)
+                continue
+            if result.returncode != 0:
+                errors = [
+                    line
+                    for line in result.stderr.decode("utf-8", errors="replace").splitlines()
+                    if line.startswith("ERROR:")
+                ]
+                for line in errors:
+                    print(f"  ✗ {line}", file=sys.stderr)
+                if not errors:
+                    print(f"  ✗ {len(batch)} videos (exit {result.returncode})", file=sys.stderr)
+
+
+async def run_pipeline(channels: list[str], args: argparse.Namespace) -> None:
+    """Overlap channel-list fetch, SRT download and Markdown conversion across channels.
+
+    Each stage runs in its own worker and hands results to the next stage
+    through a bounded queue, so while channel N downloads subtitles,
+    channel N+1 is already fetching its video list and channel N-1 is
+    being converted. ``None`` is pushed down the queues to stop the workers.
+    """
+    loop = asyncio.get_running_loop()
+    csv_q: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+    srt_q: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+    md_q: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    async def producer() -> None:
+        for channel_url in channels:
+            await csv_q.put(channel_url)
+        await csv_q.put(None)
+
+    async def csv_worker() -> None:
+        while (channel_url := await csv_q.get()) is not None:
+            print(f"\nProcessing channel: {channel_url}")
+            try:
+                csv_path = await loop.run_in_executor(
+                    None, get_channel_videos, channel_url, args.limit, args.csv_dir, args.incremental
+                )
+            except subprocess.CalledProcessError as exc:
+                print(f"✗ Failed: {channel_url} (exit {exc.returncode})", file=sys.stderr)
+                continue
+            except Exception as exc:
+                # 列表抓取在本进程内运行，任何异常都只让当前频道失败
+                print(f"✗ Failed: {channel_url} ({type(exc).__name__}: {exc})", file=sys.stderr)
+                continue
+            await srt_q.put((channel_url, csv_path))
+        await srt_q.put(None)
+
+    async def srt_worker() -> None:
+        while (item := await srt_q.get()) is not None:
+            channel_url, csv_path = item
+            try:
+                await loop.run_in_executor(
+                    None, download_srt_files, csv_path, args.srt_dir, args.workers
+                )
+            except Exception as exc:
+                print(f"✗ Failed: {channel_url} ({type(exc).__name__}: {exc})", file=sys.stderr)
+                continue
+            print(f"✓ Completed: {extract_handle(channel_url)}")
+            await md_q.put(Path(csv_path).stem)
+        await md_q.put(None)
+
+    async def md_worker() -> None:
+        while (channel_name := await md_q.get()) is not None:
+            if args.no_markdown:
+                continue
+            channel_dir = os.path.join(args.srt_dir, channel_name)
+            try:
+                converted = await srt_to_markdown.process_directory_async(
+                    os.path.join(channel_dir, "srt"), os.path.join(channel_dir, "md")
+                )
+            except Exception as exc:
+                print(f"✗ Failed to convert {channel_name} ({type(exc).__name__}: {exc})", file=sys.stderr)
+                continue
+            print(f"✓ Converted {converted} files from {channel_name}")
+
+    await asyncio.gather(
+        asyncio.create_task(producer()),
+        asyncio.create_task(csv_worker()),
+        asyncio.create_task(srt_worker()),
+        asyncio.create_task(md_worker()),
+    )
 
 
 def main() -> int:
@@ -152,6 +240,17 @@ def main() -> int:
         action="store_true",
         help="Only download new videos not already downloaded.",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=10,
+        help="Number of concurrent yt-dlp processes per channel (URLs are split between them).",
+    )
+    parser.add_argument(
+        "--no-markdown",
+        action="store_true",
+        help="Skip converting downloaded SRT files to Markdown.",
+    )
     
     args = parser.parse_args()
     
@@ -167,14 +266,7 @@ def main() -> int:
         print("No channels found in channels file.", file=sys.stderr)
         return 1
     
-    for channel_url in channels:
-        try:
-            print(f"\nProcessing channel: {channel_url}")
-            csv_path = get_channel_videos(channel_url, args.limit, args.csv_dir, args.incremental)
-            download_srt_files(csv_path, args.srt_dir)
-            print(f"✓ Completed: {extract_handle(channel_url)}")
-        except subprocess.CalledProcessError as exc:
-            print(f"✗ Failed: {channel_url} (exit {exc.returncode})", file=sys.stderr)
+    asyncio.run(run_pipeline(channels, args))
     
     print(f"\n✓ All subtitles saved to: {args.srt_dir}")
     return 0
@@ -1,12 +1,27 @@
 #!/usr/bin/env python3
 import argparse
+import contextlib
 import csv
+import io
+import itertools
 import json
 import os
 import re
 import shutil
 import subprocess
 import sys
+import tempfile
+from typing import IO, Iterable, Iterator
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
 
 # 使用方法
 # python3 download_youtube_channel_list.py --channel-url "https://www.youtube.com/@joerogan/videos" --limit 50
@@ -18,6 +33,9 @@ import sys
 # view_count：播放量
 # webpage_url：视频链接
 
+_HANDLE_RE = re.compile(r"@([^/?#]+)")
+FIELDNAMES = ["title", "duration", "upload_date", "view_count", "webpage_url"]
+
 
 def build_command(channel_url: str, limit: int | None) -> list[str]:
     cmd = [
@@ -56,13 +74,19 @@ def parse_entries(payload: dict) -> list[dict]:
 
 
 def extract_handle(channel_url: str) -> str | None:
-    match = re.search(r"@([^/?#]+)", channel_url)
+    match = _HANDLE_RE.search(channel_url)
     if not match:
         return None
     return match.group(1)
 
 
+def video_id(url: str) -> str:
+    """Return the v= id of a watch URL; without v=, the URL up to its first '&'."""
+    return url.rpartition("v=")[2].partition("&")[0]
+
+
 def load_existing(output_path: str) -> set[str]:
+    """Return the video ids already present in the CSV."""
     if not os.path.exists(output_path):
         return set()
     existing: set[str] = set()
@@ -75,11 +99,206 @@ def load_existing(output_path: str) -> set[str]:
                 continue
             url = row[4].strip() if len(row) >= 5 else ""
             if url:
-                existing.add(url)
+                existing.add(video_id(url))
     return existing
 
 
-def main() -> int:
+def read_urls_from_multi_column_csv(csv_path: str) -> list[str]:
+    """Read the webpage_url column from a CSV written by this script."""
+    urls: list[str] = []
+    with open(csv_path, "r", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next((row for row in reader if row), None)
+        if not header or "webpage_url" not in header:
+            return urls
+        col = header.index("webpage_url")
+        for row in reader:
+            if len(row) <= col:
+                continue
+            url = row[col].strip()
+            if url and not url.startswith("#"):
+                urls.append(url)
+    return urls
+
+
+class _PrefixRecorder:
+    """Read-through wrapper that keeps the bytes read so far until ``recording`` is turned off."""
+
+    def __init__(self, stream: IO[bytes]) -> None:
+        self.stream = stream
+        self.chunks: list[bytes] = []
+        self.recording = True
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.stream.read(size)
+        if self.recording:
+            self.chunks.append(data)
+        return data
+
+    def recorded(self) -> bytes:
+        return b"".join(self.chunks)
+
+
+def _top_level_keys(prefix: bytes) -> dict:
+    """Parse the complete top-level keys (except entries) out of a possibly truncated payload."""
+    top = {}
+    try:
+        for key, value in ijson.kvitems(io.BytesIO(prefix), "", use_float=True):
+            if key != "entries":
+                top[key] = value
+    except ijson.JSONError:
+        pass
+    return top
+
+
+def stream_entries(stream: IO[bytes]) -> Iterator[dict]:
+    """Yield video entries from yt-dlp JSON as they are parsed.
+
+    Entries of a playlist/channel are built by ijson's ``items`` one at a
+    time. The bytes read before the first entry are kept: if no entry
+    shows up (single-video payload) they are the whole payload and go
+    through parse_entries; otherwise they hold the top-level keys before
+    ``entries``, which decide whether this is a ``_type == "url"``
+    payload that parse_entries would return as itself. Keys that only
+    arrive after the entries cannot change what was already yielded.
+    """
+    recorder = _PrefixRecorder(stream)
+    for entry in ijson.items(recorder, "entries.item", use_float=True):
+        if not entry:
+            continue
+        if recorder.recording:
+            recorder.recording = False
+            top = _top_level_keys(recorder.recorded())
+            recorder.chunks = []
+            if top.get("_type") == "url" and top.get("url"):
+                yield top
+                # 读完剩余输出，避免 yt-dlp 阻塞在写管道上
+                while stream.read(1 << 16):
+                    pass
+                return
+        yield entry
+    if recorder.recording:
+        yield from parse_entries(json_loads(recorder.recorded()))
+
+
+def write_rows(entries: Iterable[dict], output_path: str, append: bool) -> int | None:
+    """Write entries to the CSV; returns rows written, or None when there were no entries."""
+    entries = iter(entries)
+    first = next(entries, None)
+    if first is None:
+        return None
+
+    existing = load_existing(output_path) if append else set()
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+
+    need_header = (
+        not append
+        or not os.path.exists(output_path)
+        or os.path.getsize(output_path) == 0
+    )
+    # 先写入临时文件，全部条目处理成功后才更新 CSV，避免中途失败留下不完整的文件
+    tmp_path = output_path + ".part"
+    written = 0
+    try:
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            if need_header:
+                writer.writerow(FIELDNAMES)
+            for entry in itertools.chain([first], entries):
+                url = entry.get("webpage_url") or entry.get("url") or entry.get("id")
+                if not url:
+                    continue
+                if not str(url).startswith("http"):
+                    url = f"https://www.youtube.com/watch?v={url}"
+                if append and video_id(url) in existing:
+                    continue
+                writer.writerow(
+                    [
+                        entry.get("title") or "",
+                        format_duration(entry.get("duration")),
+                        format_upload_date(entry.get("upload_date")),
+                        entry.get("view_count") or "",
+                        url,
+                    ]
+                )
+                written += 1
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp_path)
+        raise
+
+    if need_header:
+        os.replace(tmp_path, output_path)
+    else:
+        with open(tmp_path, "rb") as src, open(output_path, "ab") as dst:
+            shutil.copyfileobj(src, dst)
+        os.unlink(tmp_path)
+    return written
+
+
+def report_written(written: int | None, output_path: str) -> int:
+    if written is None:
+        print("No video entries found.", file=sys.stderr)
+        return 1
+    print(f"Wrote {written} rows to {output_path}")
+    return 0
+
+
+def stream_and_write(cmd: list[str], env: dict[str, str] | None, output_path: str, append: bool) -> int:
+    """Stream yt-dlp's JSON straight into the CSV without buffering the whole payload."""
+    written = None
+    parse_failed = False
+    with tempfile.TemporaryFile() as err:
+        with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=err, env=env) as proc:
+            def entries() -> Iterator[dict]:
+                yield from stream_entries(proc.stdout)
+                # yt-dlp 失败时不能提交已经写出的行
+                if proc.wait() != 0:
+                    raise subprocess.CalledProcessError(proc.returncode, cmd)
+
+            try:
+                written = write_rows(entries(), output_path, append)
+            except ijson.JSONError:
+                parse_failed = True
+            except subprocess.CalledProcessError:
+                pass
+            finally:
+                proc.stdout.close()
+        if proc.returncode != 0:
+            print("Error: yt-dlp failed to fetch the list.", file=sys.stderr)
+            err.seek(0)
+            stderr = err.read().decode("utf-8", errors="replace").strip()
+            if stderr:
+                print(stderr, file=sys.stderr)
+            return proc.returncode
+
+    if parse_failed:
+        print("Error: failed to parse yt-dlp JSON output.", file=sys.stderr)
+        return 1
+    return report_written(written, output_path)
+
+
+def fetch_and_write(cmd: list[str], env: dict[str, str] | None, output_path: str, append: bool) -> int:
+    """Fallback when ijson is unavailable: buffer the full JSON payload, then write."""
+    # 保持 stdout 为 bytes，orjson / json 都可以直接解析，省去一次解码
+    result = subprocess.run(cmd, capture_output=True, env=env)
+    if result.returncode != 0:
+        print("Error: yt-dlp failed to fetch the list.", file=sys.stderr)
+        stderr = result.stderr.decode("utf-8", errors="replace").strip()
+        if stderr:
+            print(stderr, file=sys.stderr)
+        return result.returncode
+
+    try:
+        payload = json_loads(result.stdout)
+    except json.JSONDecodeError:
+        print("Error: failed to parse yt-dlp JSON output.", file=sys.stderr)
+        return 1
+
+    return report_written(write_rows(parse_entries(payload), output_path, append), output_path)
+
+
+def main(argv: list[str] | None = None, env: dict[str, str] | None = None) -> int:
     parser = argparse.ArgumentParser(
         description="Download a YouTube creator's video list and write URLs to CSV."
     )
@@ -109,7 +328,7 @@ def main() -> int:
         action="store_true",
         help="Only fetch new videos not already in the CSV.",
     )
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     if not shutil.which("yt-dlp"):
         print("Error: yt-dlp is not installed or not in PATH.", file=sys.stderr)
@@ -125,65 +344,14 @@ def main() -> int:
             return 1
         args.output = os.path.join("youtube_dump", f"{handle}.csv")
 
-    cmd = build_command(args.channel_url, args.limit)
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    if result.returncode != 0:
-        print("Error: yt-dlp failed to fetch the list.", file=sys.stderr)
-        if result.stderr:
-            print(result.stderr.strip(), file=sys.stderr)
-        return result.returncode
-
-    try:
-        payload = json.loads(result.stdout)
-    except json.JSONDecodeError:
-        print("Error: failed to parse yt-dlp JSON output.", file=sys.stderr)
-        return 1
-
-    entries = parse_entries(payload)
-    if not entries:
-        print("No video entries found.", file=sys.stderr)
-        return 1
-
     # 启用增量模式时自动启用append
     if args.incremental:
         args.append = True
-    
-    existing = load_existing(args.output) if args.append else set()
-    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
 
-    write_mode = "a" if args.append else "w"
-    need_header = (
-        not args.append
-        or not os.path.exists(args.output)
-        or os.path.getsize(args.output) == 0
-    )
-    fieldnames = ["title", "duration", "upload_date", "view_count", "webpage_url"]
-    written = 0
-    with open(args.output, write_mode, encoding="utf-8", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        if need_header:
-            writer.writeheader()
-        for entry in entries:
-            url = entry.get("webpage_url") or entry.get("url") or entry.get("id")
-            if not url:
-                continue
-            if not str(url).startswith("http"):
-                url = f"https://www.youtube.com/watch?v={url}"
-            if args.append and url in existing:
-                continue
-            writer.writerow(
-                {
-                    "title": entry.get("title") or "",
-                    "duration": format_duration(entry.get("duration")),
-                    "upload_date": format_upload_date(entry.get("upload_date")),
-                    "view_count": entry.get("view_count") or "",
-                    "webpage_url": url,
-                }
-            )
-            written += 1
-
-    print(f"Wrote {written} rows to {args.output}")
-    return 0
+    cmd = build_command(args.channel_url, args.limit)
+    if ijson is None:
+        return fetch_and_write(cmd, env, args.output, args.append)
+    return stream_and_write(cmd, env, args.output, args.append)
 
 
 if __name__ == "__main__":
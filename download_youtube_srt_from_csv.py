@@ -1,10 +1,25 @@
 #!/usr/bin/env python3
 import argparse
+import asyncio
 import csv
 import os
-import shutil
-import subprocess
 import sys
+import threading
+
+from download_youtube_channel_list import read_urls_from_multi_column_csv
+
+try:
+    from yt_dlp import YoutubeDL
+    from yt_dlp.utils import DownloadError, sanitize_filename
+except ImportError:
+    YoutubeDL = None
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
 
 # 对 youtube_url.csv 文件( youtube 视频链接,多个 url 直接换行)里的所有链接下载 srt 字幕到 download_srt 目录
 
@@ -22,37 +37,153 @@ def read_urls(csv_path: str) -> list[str]:
     return urls
 
 
-def read_urls_from_multi_column_csv(csv_path: str) -> list[str]:
-    """Read URLs from CSV exported by download_youtube_channel_list.py"""
-    urls: list[str] = []
-    with open(csv_path, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            url = row.get("webpage_url", "").strip()
-            if url and not url.startswith("#"):
-                urls.append(url)
-    return urls
+def build_ydl_opts(video_dir: str, srt_dir: str, download_video: bool) -> dict:
+    return {
+        "writesubtitles": True,
+        "writeautomaticsub": True,
+        "subtitlesformat": "srt",
+        "skip_download": not download_video,
+        "paths": {
+            "home": os.path.abspath(video_dir),
+            "subtitle": os.path.abspath(srt_dir),
+        },
+        "quiet": True,
+    }
+
+
+_local = threading.local()
+
+
+def _get_extractor() -> "YoutubeDL":
+    # YoutubeDL 不是线程安全的，每个线程复用各自的实例
+    ydl = getattr(_local, "ydl", None)
+    if ydl is None:
+        ydl = YoutubeDL({"quiet": True, "skip_download": True})
+        _local.ydl = ydl
+    return ydl
+
+
+def pick_subtitle(info: dict, lang: str) -> tuple[str, str, str] | None:
+    """Return (lang, ext, url) of the preferred subtitle track, manual before automatic."""
+    for source in ("subtitles", "automatic_captions"):
+        tracks = info.get(source) or {}
+        formats = tracks.get(lang)
+        if not formats:
+            continue
+        by_ext = {fmt.get("ext"): fmt for fmt in formats if fmt.get("url")}
+        for ext in ("srt", "vtt"):
+            if ext in by_ext:
+                return lang, ext, by_ext[ext]["url"]
+    return None
+
+
+def vtt_to_srt(vtt: str) -> str:
+    """Convert WebVTT text to SRT (cue numbering and comma millisecond separator)."""
+    cues: list[str] = []
+    for block in vtt.replace("\r\n", "\n").split("\n\n"):
+        lines = [line for line in block.strip().split("\n") if line.strip()]
+        for i, line in enumerate(lines):
+            if "-->" in line:
+                break
+        else:
+            continue
+        start, _, end = lines[i].partition("-->")
+        start = start.strip().replace(".", ",")
+        end = end.strip().split(" ")[0].replace(".", ",")
+        if start.count(":") == 1:
+            start = "00:" + start
+        if end.count(":") == 1:
+            end = "00:" + end
+        text = "\n".join(lines[i + 1:])
+        if text:
+            cues.append(f"{len(cues) + 1}\n{start} --> {end}\n{text}")
+    return "\n\n".join(cues) + "\n"
+
 
+def _write_text(path: str, text: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
 
-def run_yt_dlp(url: str, video_dir: str, srt_dir: str, download_video: bool) -> None:
-    video_dir = os.path.abspath(video_dir)
-    srt_dir = os.path.abspath(srt_dir)
-    cmd = [
-        "yt-dlp",
-        "--write-subs",
-        "--write-auto-subs",
-        "--sub-format",
-        "srt",
-        "--paths",
-        f"home:{video_dir}",
-        "--paths",
-        f"subtitle:{srt_dir}",
-        url,
-    ]
-    if not download_video:
-        cmd.insert(1, "--skip-download")
 
-    subprocess.run(cmd, check=True)
+async def fetch_srt(
+    session: "aiohttp.ClientSession",
+    url: str,
+    srt_dir: str,
+    sem: asyncio.Semaphore,
+    lang: str = "en",
+    retries: int = 3,
+) -> bool:
+    """Fetch one video's subtitle track directly over HTTP and save it as SRT."""
+    # 单个 URL 的任何异常（例如字幕内容无法解码）都只算作该 URL 失败，不中断整个批次
+    try:
+        return await _fetch_srt(session, url, srt_dir, sem, lang, retries)
+    except Exception as exc:
+        print(f"Failed: {url} ({type(exc).__name__}: {exc})", file=sys.stderr)
+        return False
+
+
+async def _fetch_srt(
+    session: "aiohttp.ClientSession",
+    url: str,
+    srt_dir: str,
+    sem: asyncio.Semaphore,
+    lang: str = "en",
+    retries: int = 3,
+) -> bool:
+    loop = asyncio.get_running_loop()
+    async with sem:
+        try:
+            info = await loop.run_in_executor(
+                None, lambda: _get_extractor().extract_info(url, download=False)
+            )
+        except DownloadError as exc:
+            print(f"Failed: {url} ({exc})", file=sys.stderr)
+            return False
+
+        track = pick_subtitle(info, lang)
+        if track is None:
+            print(f"Failed: {url} (no {lang} subtitles)", file=sys.stderr)
+            return False
+        track_lang, ext, sub_url = track
+
+        # 网络错误和限流/服务端错误按指数退避重试
+        body = None
+        error = ""
+        for attempt in range(retries):
+            if attempt:
+                await asyncio.sleep(2 ** (attempt - 1))
+            try:
+                async with session.get(sub_url) as resp:
+                    if resp.status in RETRY_STATUSES:
+                        error = f"HTTP {resp.status}"
+                        continue
+                    if resp.status >= 400:
+                        print(f"Failed: {url} (HTTP {resp.status})", file=sys.stderr)
+                        return False
+                    body = await resp.text()
+                    break
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                error = str(exc) or type(exc).__name__
+        if body is None:
+            print(f"Failed: {url} ({error})", file=sys.stderr)
+            return False
+
+        if ext == "vtt":
+            body = vtt_to_srt(body)
+        filename = f"{sanitize_filename(info.get('title') or '')} [{info['id']}].{track_lang}.srt"
+        await loop.run_in_executor(None, _write_text, os.path.join(srt_dir, filename), body)
+        return True
+
+
+async def download_srts_async(urls: list[str], srt_dir: str, concurrency: int = 64) -> int:
+    """Fetch subtitles for all URLs concurrently; returns the number saved."""
+    connector = aiohttp.TCPConnector(limit_per_host=concurrency)
+    async with aiohttp.ClientSession(connector=connector, trust_env=True) as session:
+        sem = asyncio.Semaphore(concurrency)
+        results = await asyncio.gather(
+            *(fetch_srt(session, url, srt_dir, sem) for url in urls)
+        )
+    return sum(results)
 
 
 def main() -> int:
@@ -79,12 +210,32 @@ def main() -> int:
         action="store_true",
         help="Download videos in addition to subtitles.",
     )
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="Fetch subtitle tracks concurrently over HTTP (requires aiohttp, no video).",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=64,
+        help="Maximum concurrent subtitle fetches in --async mode.",
+    )
     args = parser.parse_args()
 
-    if not shutil.which("yt-dlp"):
-        print("Error: yt-dlp is not installed or not in PATH.", file=sys.stderr)
+    if YoutubeDL is None:
+        print("Error: yt-dlp is not installed (pip install yt-dlp).", file=sys.stderr)
         return 1
 
+    if args.use_async:
+        if aiohttp is None:
+            print("Error: --async requires aiohttp (pip install aiohttp).", file=sys.stderr)
+            return 1
+        if args.with_video:
+            print("Error: --async cannot be combined with --with-video.", file=sys.stderr)
+            return 1
+
     if not os.path.exists(args.csv):
         print(f"Error: CSV file not found: {args.csv}", file=sys.stderr)
         return 1
@@ -97,11 +248,19 @@ def main() -> int:
         print("No URLs found in CSV.", file=sys.stderr)
         return 1
 
-    for url in urls:
-        try:
-            run_yt_dlp(url, args.video_dir, args.srt_dir, args.with_video)
-        except subprocess.CalledProcessError as exc:
-            print(f"Failed: {url} (exit {exc.returncode})", file=sys.stderr)
+    if args.use_async:
+        saved = asyncio.run(download_srts_async(urls, args.srt_dir, max(1, args.concurrency)))
+        print(f"Saved {saved}/{len(urls)} subtitles to {args.srt_dir}")
+        return 0
+
+    # 复用同一个 YoutubeDL 实例，避免每个 URL 都重新启动 yt-dlp
+    ydl_opts = build_ydl_opts(args.video_dir, args.srt_dir, args.with_video)
+    with YoutubeDL(ydl_opts) as ydl:
+        for url in urls:
+            try:
+                ydl.download([url])
+            except DownloadError as exc:
+                print(f"Failed: {url} ({exc})", file=sys.stderr)
 
     return 0
 
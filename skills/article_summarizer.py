@@ -5,10 +5,27 @@
 """
 
 import argparse
+import multiprocessing
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
+# Markdown 中的时间戳，例如 **[01:23]**
+_TIMESTAMP_RE = re.compile(r'\*\*\[[^\]]+\]\*\*')
+# 行首的标题/列表符号
+_MD_PREFIX_RE = re.compile(r'^[#*]+\s*')
+_DIGIT_RE = re.compile(r'\d')
+# 提取关键词时替换为空格的标点
+_PUNCT_TABLE = str.maketrans(dict.fromkeys(',.!?:;()"\'[]', ' '))
+# 支持的文件格式
+_ARTICLE_EXTS = ('.md', '.txt')
+# 使用 spawn 而不是 fork 启动子进程，避免在多线程进程中 fork 导致死锁
+_MP_CONTEXT = multiprocessing.get_context('spawn')
+# 待总结文章少于该数量时直接在当前进程处理，启动进程池的开销比总结本身更大
+_SERIAL_THRESHOLD = 32
+_STOPWORDS = frozenset({'this', 'that', 'about', 'they', 'would', 'could'})
+
 
 class ArticleSummarizer:
     def __init__(self):
@@ -17,8 +34,7 @@ class ArticleSummarizer:
     def read_article(self, file_path: str) -> str:
         """读取文章内容"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return f.read()
+            return Path(file_path).read_text(encoding='utf-8')
         except Exception as e:
             return f"读取文件失败: {e}"
     
@@ -30,7 +46,7 @@ class ArticleSummarizer:
             line = line.strip()
             if line and not line.startswith('**[') and not line.startswith('#'):
                 # 移除可能的时间戳和格式符号
-                clean_title = re.sub(r'\*\*\[[^\]]+\]\*\*', '', line).strip()
+                clean_title = _TIMESTAMP_RE.sub('', line).strip()
                 if len(clean_title) > 5 and len(clean_title) < 200:
                     return clean_title
         
@@ -42,6 +58,7 @@ class ArticleSummarizer:
         """提取关键要点"""
         lines = content.split('\n')
         key_points = []
+        seen = set()
         
         for line in lines:
             stripped = line.strip()
@@ -49,13 +66,14 @@ class ArticleSummarizer:
                 continue
             
             # 移除时间戳和格式符号
-            clean_line = re.sub(r'\*\*\[[^\]]+\]\*\*', '', stripped).strip()
-            clean_line = re.sub(r'^[#*]+\s*', '', clean_line).strip()
+            clean_line = _TIMESTAMP_RE.sub('', stripped).strip()
+            clean_line = _MD_PREFIX_RE.sub('', clean_line).strip()
             
             # 只保留有意义的句子
             if len(clean_line) > 20 and len(clean_line) < 300:
                 # 避免重复
-                if clean_line not in key_points:
+                if clean_line not in seen:
+                    seen.add(clean_line)
                     key_points.append(clean_line)
                     if len(key_points) >= max_points:
                         break
@@ -65,25 +83,25 @@ class ArticleSummarizer:
     def extract_keywords(self, content: str) -> list:
         """提取关键词"""
         # 移除时间戳和格式符号
-        clean_content = re.sub(r'\*\*\[[^\]]+\]\*\*', '', content)
-        clean_content = re.sub(r'[,\.!?:;()"\'\[\]]', ' ', clean_content)
+        clean_content = _TIMESTAMP_RE.sub('', content)
+        clean_content = clean_content.translate(_PUNCT_TABLE)
         
         words = clean_content.split()
         
         # 找出有意义的词（长度>5的词，包含大写字母的词，或数字组合）
         keywords = []
         for word in words:
-            word = word.strip()
             if len(word) > 5 and not word.startswith('http'):
+                lower = word.lower()
                 # 可能是关键词的条件
-                if (any(c.isupper() for c in word) or 
-                    any(c.isdigit() for c in word) or 
-                    len(word) > 8):
-                    if word.lower() not in ['this', 'that', 'about', 'they', 'would', 'could']:
+                if (len(word) > 8 or
+                        word != lower or
+                        _DIGIT_RE.search(word)):
+                    if lower not in _STOPWORDS:
                         keywords.append(word)
         
-        # 去重并限制数量
-        unique_keywords = list(set(keywords))[:15]
+        # 去重（保持出现顺序）并限制数量
+        unique_keywords = list(dict.fromkeys(keywords))[:15]
         return unique_keywords
     
     def generate_summary(self, content: str, title: str, detailed: bool = True) -> str:
@@ -162,25 +180,51 @@ class ArticleSummarizer:
         
         return summary
     
-    def process_directory(self, dir_path: str, output_dir: str = None, detailed: bool = True) -> dict:
-        """处理整个目录"""
+    def _summarize_pending(self, pending: list, detailed: bool, workers: int = None):
+        """逐篇生成总结，返回 (文章路径, 处理结果) 的迭代器"""
+        if workers == 1 or len(pending) < _SERIAL_THRESHOLD:
+            for article_path, output_path in pending:
+                try:
+                    yield article_path, self.process_article(article_path, output_path, detailed)
+                except Exception as e:
+                    yield article_path, f"处理失败 {article_path}: {e}"
+            return
+        
+        # 每篇文章的总结互不依赖，使用多进程并行处理
+        with ProcessPoolExecutor(max_workers=workers, mp_context=_MP_CONTEXT) as executor:
+            futures = {
+                executor.submit(self.process_article, article_path, output_path, detailed): article_path
+                for article_path, output_path in pending
+            }
+            
+            for future in as_completed(futures):
+                article_path = futures[future]
+                try:
+                    yield article_path, future.result()
+                except Exception as e:
+                    yield article_path, f"处理失败 {article_path}: {e}"
+    
+    def process_directory(self, dir_path: str, output_dir: str = None, detailed: bool = True,
+                          workers: int = None, force: bool = False) -> dict:
+        """处理整个目录
+
+        文章较多时会用 spawn 方式启动子进程并行处理，调用本方法的脚本
+        需要把入口代码放在 ``if __name__ == "__main__":`` 之下。
+        """
         results = {"success": 0, "failed": 0, "skipped": 0}
         
         if not os.path.exists(dir_path):
             print(f"错误: 目录不存在 - {dir_path}")
             return results
         
-        # 支持的文件格式
-        supported_extensions = ['.md', '.txt', '.en.md']
-        
         # 查找所有文章文件
         articles = []
         for root, dirs, files in os.walk(dir_path):
+            # 不进入隐藏目录和总结输出目录
+            dirs[:] = [d for d in dirs if not d.startswith('.') and d != 'summaries']
             for file in files:
-                if any(file.endswith(ext) for ext in supported_extensions):
-                    # 跳过已经总结过的文件
-                    if 'summary' in file.lower():
-                        continue
+                # 跳过已经生成的总结文件
+                if file.endswith(_ARTICLE_EXTS) and not file.endswith('_summary.md'):
                     articles.append(os.path.join(root, file))
         
         if not articles:
@@ -189,28 +233,37 @@ class ArticleSummarizer:
         
         print(f"找到 {len(articles)} 篇文章待总结...")
         
+        pending = []
         for article_path in articles:
-            try:
-                # 确定输出路径
-                if output_dir:
-                    filename = os.path.basename(article_path)
-                    summary_filename = filename.replace('.md', '_summary.md')
-                    output_path = os.path.join(output_dir, summary_filename)
-                else:
-                    output_path = article_path.replace('.md', '_summary.md')
-                
-                result = self.process_article(article_path, output_path, detailed)
-                
-                if result.startswith("✓"):
-                    results["success"] += 1
-                    print(result)
-                else:
-                    results["failed"] += 1
-                    print(f"✗ {result}")
-                    
-            except Exception as e:
+            # 确定输出路径
+            if output_dir:
+                filename = os.path.basename(article_path)
+                summary_filename = filename.replace('.md', '_summary.md')
+                output_path = os.path.join(output_dir, summary_filename)
+            else:
+                output_path = article_path.replace('.md', '_summary.md')
+            
+            # 总结比原文新时跳过，避免重复总结
+            if not force:
+                try:
+                    if os.stat(output_path).st_mtime >= os.stat(article_path).st_mtime:
+                        results["skipped"] += 1
+                        continue
+                except FileNotFoundError:
+                    pass
+            
+            pending.append((article_path, output_path))
+        
+        if not pending:
+            return results
+        
+        for article_path, result in self._summarize_pending(pending, detailed, workers):
+            if result.startswith("✓"):
+                results["success"] += 1
+                print(result)
+            else:
                 results["failed"] += 1
-                print(f"✗ 处理失败 {article_path}: {e}")
+                print(f"✗ {result}")
         
         return results
 
@@ -260,6 +313,19 @@ def main():
         help='生成简要总结而非详细总结'
     )
     
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='即使总结比原文新也重新生成'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='目录模式下并行总结的进程数（默认：CPU 核数）'
+    )
+    
     parser.add_argument(
         '--print',
         action='store_true',
@@ -275,7 +341,9 @@ def main():
         results = summarizer.process_directory(
             args.directory, 
             args.output, 
-            not args.brief
+            not args.brief,
+            workers=max(1, args.workers) if args.workers is not None else None,
+            force=args.force
         )
         print(f"\n总结完成: 成功 {results['success']}, 失败 {results['failed']}, 跳过 {results['skipped']}")
         
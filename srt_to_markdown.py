@@ -1,14 +1,54 @@
 #!/usr/bin/env python3
 import argparse
+import asyncio
+import contextlib
+import multiprocessing
 import os
 import re
 import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
+from typing import Iterable, Iterator
+
+try:
+    from orjson import dumps as json_dumps, loads as json_loads
+except ImportError:
+    import json
+
+    def json_dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+    json_loads = json.loads
+
+# HTML tags, curly brace content and square bracket content, removed in one pass
+_CLEAN_RE = re.compile(r'<[^>]+>|\{[^}]+\}|\[[^\]]+\]')
+_SRT_TS_RE = re.compile(r'(\d+):(\d+):(\d+),(\d+)')
+_SRT_RANGE_RE = re.compile(r'(\d+:\d+:\d+,\d+)\s*-->\s*(\d+:\d+:\d+,\d+)')
+WRITE_BUFFER_SIZE = 1 << 16
+# Written to each md directory to remember which SRT files are already converted
+SIDECAR_NAME = '.converted.json'
+# Workers are spawned, not forked: process_directory also runs from a thread inside
+# auto_fetch_subtitles' pipeline, and forking a multi-threaded process can deadlock
+_MP_CONTEXT = multiprocessing.get_context('spawn')
+# Below this many pending files, converting inline beats starting a spawned pool
+SERIAL_THRESHOLD = 32
+
+
+def _is_fixed_width_time(ts: str) -> bool:
+    """Check for the canonical HH:MM:SS,mmm SRT timestamp layout."""
+    return (
+        len(ts) == 12
+        and ts[2] == ':' and ts[5] == ':' and ts[8] == ','
+        and (ts[0:2] + ts[3:5] + ts[6:8] + ts[9:12]).isdigit()
+    )
 
 
 def parse_srt_time(time_str: str) -> tuple[int, int, int, int]:
     """Parse SRT timestamp to hours, minutes, seconds, milliseconds."""
-    match = re.match(r'(\d+):(\d+):(\d+),(\d+)', time_str.strip())
+    time_str = time_str.strip()
+    if _is_fixed_width_time(time_str):
+        return int(time_str[0:2]), int(time_str[3:5]), int(time_str[6:8]), int(time_str[9:12])
+    match = _SRT_TS_RE.match(time_str)
     if match:
         return int(match.group(1)), int(match.group(2)), int(match.group(3)), int(match.group(4))
     return 0, 0, 0, 0
@@ -23,11 +63,7 @@ def format_timestamp(hours: int, minutes: int, seconds: int, milliseconds: int)
 
 def clean_text(text: str) -> str:
     """Clean subtitle text by removing common artifacts."""
-    text = re.sub(r'<[^>]+>', '', text)  # Remove HTML tags
-    text = re.sub(r'\{[^}]+\}', '', text)  # Remove curly brace content
-    text = re.sub(r'\[[^\]]+\]', '', text)  # Remove square bracket content
-    text = text.strip()
-    return text
+    return _CLEAN_RE.sub('', text).strip()
 
 
 def should_merge_subtitle(text: str) -> bool:
@@ -42,74 +78,205 @@ def should_merge_subtitle(text: str) -> bool:
     return True
 
 
+def parse_start_time(time_line: str) -> tuple[int, int, int, int] | None:
+    """Extract the start time from an SRT timing line, or None if it has none."""
+    start, _, end = time_line.partition('-->')
+    start = start.strip()
+    if _is_fixed_width_time(start) and _is_fixed_width_time(end.strip()[:12]):
+        return int(start[0:2]), int(start[3:5]), int(start[6:8]), int(start[9:12])
+    # Fall back to the lenient pattern for non-standard widths
+    time_match = _SRT_RANGE_RE.search(time_line)
+    if time_match:
+        return parse_srt_time(time_match.group(1))
+    return None
+
+
+def iter_srt_blocks(f: Iterable[str]) -> Iterator[list[str]]:
+    """Stream blank-line separated SRT blocks as lists of lines."""
+    block: list[str] = []
+    for line in f:
+        line = line.rstrip('\n')
+        if line.strip():
+            block.append(line)
+        elif block:
+            yield block
+            block = []
+    if block:
+        yield block
+
+
 def convert_srt_to_markdown(srt_path: str, md_path: str, include_timestamps: bool = True) -> None:
     """Convert a single SRT file to Markdown format."""
+    # Stream cues straight to a temp file; it replaces md_path only on success so a
+    # failed run never leaves a truncated, newer-looking Markdown file behind.
+    tmp_path = md_path + '.part'
     with open(srt_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # Parse SRT content
-    blocks = re.split(r'\n\s*\n', content.strip())
-    md_lines = []
+        os.makedirs(os.path.dirname(md_path) or '.', exist_ok=True)
+        try:
+            with open(tmp_path, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as out:
+                # Cues are separated by a blank line; write the separator before each cue but the first
+                sep = ''
+                for block in iter_srt_blocks(f):
+                    lines = block
+                    lines[0] = lines[0].lstrip()
+                    lines[-1] = lines[-1].rstrip()
+                    if len(lines) < 3:
+                        continue
+                    
+                    # Try to extract subtitle index and time info
+                    if lines[0].isdigit() and '-->' in lines[1]:
+                        text = clean_text(' '.join(lines[2:]))
+                        
+                        if not text:
+                            continue
+                        
+                        # Extract timestamp
+                        start_time = parse_start_time(lines[1]) if include_timestamps else None
+                        out.write(sep)
+                        if start_time is not None:
+                            out.write('**[')
+                            out.write(format_timestamp(*start_time))
+                            out.write(']** ')
+                        out.write(text)
+                        sep = '\n\n'
+                    else:
+                        # Handle malformed blocks
+                        text = clean_text(' '.join(lines))
+                        if text:
+                            out.write(sep)
+                            out.write(text)
+                            sep = '\n\n'
+                out.write('\n')
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(tmp_path)
+            raise
+    os.replace(tmp_path, md_path)
+
+
+def load_sidecar(path: str) -> dict:
+    """Load the record of already converted SRT files, or {} if missing or unreadable."""
+    try:
+        with open(path, 'rb') as f:
+            data = json_loads(f.read())
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def save_sidecar(path: str, records: dict) -> None:
+    """Atomically write the record of converted SRT files."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.part'
+    with open(tmp_path, 'wb') as f:
+        f.write(json_dumps(records))
+    os.replace(tmp_path, path)
+
+
+def _convert_pending(pending: list, include_timestamps: bool, workers: int | None) -> Iterator[tuple]:
+    """Convert the pending files, yielding (srt_name, md_file, record, error) for each."""
+    if workers == 1 or len(pending) < SERIAL_THRESHOLD:
+        # A spawned pool takes ~0.4s to start, longer than a few small conversions
+        for srt_file, md_file, md_path, record in pending:
+            try:
+                convert_srt_to_markdown(srt_file.path, md_path, include_timestamps)
+            except Exception as e:
+                yield srt_file.name, md_file, record, e
+            else:
+                yield srt_file.name, md_file, record, None
+        return
     
-    for block in blocks:
-        lines = block.strip().split('\n')
-        if len(lines) < 3:
-            continue
+    # Conversion is CPU-bound and independent per file, so fan out to processes
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_MP_CONTEXT) as executor:
+        futures = {}
+        for srt_file, md_file, md_path, record in pending:
+            future = executor.submit(convert_srt_to_markdown, srt_file.path, md_path, include_timestamps)
+            futures[future] = (srt_file.name, md_file, record)
         
-        # Try to extract subtitle index and time info
-        if lines[0].isdigit() and '-->' in lines[1]:
-            text = ' '.join(lines[2:])
-            text = clean_text(text)
-            
-            if not text:
-                continue
-            
-            # Extract timestamp
-            if include_timestamps:
-                time_match = re.search(r'(\d+:\d+:\d+,\d+)\s*-->\s*(\d+:\d+:\d+,\d+)', lines[1])
-                if time_match:
-                    start_time = parse_srt_time(time_match.group(1))
-                    timestamp = format_timestamp(*start_time)
-                    md_lines.append(f"**[{timestamp}]** {text}")
-                else:
-                    md_lines.append(text)
+        for future in as_completed(futures):
+            srt_name, md_file, record = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                yield srt_name, md_file, record, e
             else:
-                md_lines.append(text)
-        else:
-            # Handle malformed blocks
-            text = ' '.join(lines)
-            text = clean_text(text)
-            if text:
-                md_lines.append(text)
-    
-    # Write Markdown file
-    os.makedirs(os.path.dirname(md_path) or '.', exist_ok=True)
-    with open(md_path, 'w', encoding='utf-8') as f:
-        f.write('\n\n'.join(md_lines) + '\n')
+                yield srt_name, md_file, record, None
+
 
+def process_directory(
+    srt_dir: str,
+    md_dir: str,
+    include_timestamps: bool = True,
+    workers: int | None = None,
+    force: bool = False,
+) -> int:
+    """Process all SRT files in a directory.
 
-def process_directory(srt_dir: str, md_dir: str, include_timestamps: bool = True) -> int:
-    """Process all SRT files in a directory."""
+    Large batches are converted in spawned worker processes, so scripts that
+    call this must guard their entry point with ``if __name__ == "__main__":``.
+    """
     srt_path = Path(srt_dir)
     if not srt_path.exists():
         print(f"Error: SRT directory not found: {srt_dir}", file=sys.stderr)
         return 0
     
     converted = 0
-    for srt_file in srt_path.glob('*.srt'):
-        md_file = srt_file.stem + '.md'
+    with os.scandir(srt_path) as it:
+        srt_files = [entry for entry in it if entry.name.endswith('.srt') and entry.is_file()]
+    if not srt_files:
+        return converted
+    
+    # Conversion record: srt name -> [st_mtime_ns, st_size, include_timestamps]
+    sidecar_path = os.path.join(md_dir, SIDECAR_NAME)
+    done = {} if force else load_sidecar(sidecar_path)
+    # One directory read tells us which outputs still exist without a stat per file
+    try:
+        with os.scandir(md_dir) as it:
+            md_names = {entry.name for entry in it}
+    except FileNotFoundError:
+        md_names = set()
+    records = {}
+    pending = []
+    for srt_file in srt_files:
+        st = srt_file.stat()
+        record = [st.st_mtime_ns, st.st_size, include_timestamps]
+        md_file = srt_file.name[:-len('.srt')] + '.md'
         md_path = os.path.join(md_dir, md_file)
-        
-        try:
-            convert_srt_to_markdown(str(srt_file), md_path, include_timestamps)
-            print(f"✓ Converted: {srt_file.name} -> {md_file}")
+        if not force:
+            # Unchanged record and the Markdown is still there: skip.
+            # A differing record means the SRT or the options changed.
+            previous = done.get(srt_file.name)
+            if previous == record and md_file in md_names:
+                records[srt_file.name] = record
+                continue
+            # No record yet: skip if the Markdown is already newer than the SRT
+            if previous is None:
+                try:
+                    if os.stat(md_path).st_mtime_ns >= st.st_mtime_ns:
+                        records[srt_file.name] = record
+                        continue
+                except FileNotFoundError:
+                    pass
+        pending.append((srt_file, md_file, md_path, record))
+    
+    for srt_name, md_file, record, error in _convert_pending(pending, include_timestamps, workers):
+        if error is None:
+            print(f"✓ Converted: {srt_name} -> {md_file}")
             converted += 1
-        except Exception as e:
-            print(f"✗ Failed: {srt_file.name} - {e}", file=sys.stderr)
+            records[srt_name] = record
+        else:
+            print(f"✗ Failed: {srt_name} - {error}", file=sys.stderr)
     
+    if records != done:
+        save_sidecar(sidecar_path, records)
     return converted
 
 
+async def process_directory_async(srt_dir: str, md_dir: str, include_timestamps: bool = True) -> int:
+    """Run process_directory in a worker thread so it can overlap with other pipeline stages."""
+    return await asyncio.to_thread(process_directory, srt_dir, md_dir, include_timestamps)
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(
         description="Convert YouTube SRT subtitle files to readable Markdown format."
@@ -134,13 +301,26 @@ def main() -> int:
         action="store_true",
         help="Remove timestamps from output",
     )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-convert files even if the Markdown is newer than the SRT",
+    )
     parser.add_argument(
         "--base-dir",
         default="youtube_subtitles",
         help="Base directory for subtitle files",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of conversion processes (default: CPU count)",
+    )
     
     args = parser.parse_args()
+    if args.workers is not None:
+        args.workers = max(1, args.workers)
     
     # Determine which directories to process
     if args.channel:
@@ -152,7 +332,7 @@ def main() -> int:
         if args.md_dir:
             md_dir = args.md_dir
         
-        converted = process_directory(srt_dir, md_dir, not args.no_timestamps)
+        converted = process_directory(srt_dir, md_dir, not args.no_timestamps, args.workers, args.force)
         print(f"\n✓ Converted {converted} files from {args.channel}")
     else:
         # Process all channels
@@ -169,7 +349,7 @@ def main() -> int:
                 
                 if os.path.exists(srt_dir):
                     print(f"\nProcessing channel: {channel_dir.name}")
-                    converted = process_directory(srt_dir, md_dir, not args.no_timestamps)
+                    converted = process_directory(srt_dir, md_dir, not args.no_timestamps, args.workers, args.force)
                     total_converted += converted
         
         print(f"\n✓ Total converted: {total_converted} files")